@@ -8,8 +8,9 @@ import os
 import sys
 import json
 import time
+import bisect
 import threading
-from collections import deque
+from array import array
 
 try:
     import keyboard
@@ -17,6 +18,23 @@ except Exception:
     print("Please install the 'keyboard' package: pip install keyboard")
     raise
 
+try:
+    import numpy as np
+except Exception:
+    print("Please install the 'numpy' package: pip install numpy")
+    raise
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    from numba import njit
+except ImportError:
+    def njit(*args, **kwargs):
+        return lambda fn: fn
+
 # ---------------------- CONFIG ----------------------
 MUSIC_SHEET_DIR = "./Music Sheets/"
 DEFAULT_HOLD_MS = 600
@@ -25,6 +43,8 @@ SAFETY_MARGIN_MS = 20
 ALLOW_OVERLAP_MS = 20
 PLAY_START_DELAY = 0.1
 SONGS_PER_PAGE = 9
+PREPROCESS_CACHE_SUFFIX = ".pp.npz"
+PREPROCESS_CACHE_VERSION = 4
 
 KEY_MAPPING = {
     "1Key0": "Y","1Key1": "U","1Key2": "I","1Key3": "O","1Key4": "P",
@@ -37,9 +57,12 @@ KEY_MAPPING = {
 
 # ---------------------- GLOBAL STATE ----------------------
 music_sheets = []
+music_sheet_basenames = []
+music_sheet_search_names = []
 current_page = 0
 page_songs = []
-song_hotkeys = {}
+page_songs_names = []
+page_song_indices = []
 selected_index = None
 queued_song = None
 last_song_index = None
@@ -48,27 +71,37 @@ paused = False
 stop_requested = False
 ready_to_play = False
 speed_multiplier = 1.0
-_speed_up_flag = False
-_speed_down_flag = False
+_speed_direction = 0
+_speed_active = threading.Event()
+# Playback clock: virtual_ms = _segment_base_ms + (now - _segment_start_perf) * 1000 * _segment_speed.
+# Only rebased (under _play_lock) when the speed changes or playback pauses/resumes.
+_segment_start_perf = 0.0
+_segment_base_ms = 0.0
+_segment_speed = 1.0
 play_thread = None
+pressed_keys = set()  # scancodes the play thread currently holds; guarded by _play_lock
 _play_lock = threading.Lock()
 
 # ---------------------- UTIL ----------------------
 def load_music_sheets():
-    global music_sheets, page_songs, current_page, song_hotkeys
+    global music_sheets, music_sheet_basenames, music_sheet_search_names, page_songs, current_page, page_song_indices
     if not os.path.exists(MUSIC_SHEET_DIR):
         os.makedirs(MUSIC_SHEET_DIR)
-    files = [os.path.join(MUSIC_SHEET_DIR, f) for f in os.listdir(MUSIC_SHEET_DIR) if f.lower().endswith('.json')]
+    with os.scandir(MUSIC_SHEET_DIR) as it:
+        files = [e.path for e in it if e.is_file() and e.name.lower().endswith('.json')]
     files.sort()
     music_sheets = files
+    music_sheet_basenames = [os.path.basename(f) for f in files]
+    music_sheet_search_names = [name.lower() for name in music_sheet_basenames]
     current_page = 0
     _rebuild_page()
 
 def _rebuild_page():
-    global page_songs, song_hotkeys
+    global page_songs, page_songs_names, page_song_indices
     start = current_page * SONGS_PER_PAGE
     page_songs = music_sheets[start:start+SONGS_PER_PAGE]
-    song_hotkeys = {str(i+1): start + i for i in range(len(page_songs))}
+    page_songs_names = music_sheet_basenames[start:start+SONGS_PER_PAGE]
+    page_song_indices = list(range(start, start + len(page_songs)))
 
 def clear_console():
     os.system('cls' if os.name == 'nt' else 'clear')
@@ -78,15 +111,20 @@ def display_ui():
     print("Sky Music Player — Auto Hold")
     print("-"*60)
     print("Controls: Space=Play/Pause | R=Replay | S=Search | 1-9 Select | -/= Page | Backspace=Stop")
-    print(f"Speed: {speed_multiplier*100:.0f}%  | Selected: {os.path.basename(music_sheets[selected_index]) if selected_index is not None else 'None'}")
+    print(f"Speed: {speed_multiplier*100:.0f}%  | Selected: {music_sheet_basenames[selected_index] if selected_index is not None else 'None'}")
     print("-"*60)
-    for i, path in enumerate(page_songs, start=1):
-        idx = song_hotkeys.get(str(i))
+    for i, (name, idx) in enumerate(zip(page_songs_names, page_song_indices), start=1):
         marker = ' [SELECTED]' if idx == selected_index else ''
-        print(f"[{i}] {os.path.basename(path)}{marker}")
+        print(f"[{i}] {name}{marker}")
     print("-"*60)
 
 # ---------------------- NOTE PREPROCESSING ----------------------
+def _json_loads(data):
+    if orjson is not None:
+        try: return orjson.loads(data)
+        except ValueError: pass  # BOM/UTF-16 exports: let the stdlib sniff the encoding
+    return json.loads(data)
+
 def _normalize_song_data(raw):
     if isinstance(raw, dict) and 'songNotes' in raw:
         return raw['songNotes']
@@ -96,143 +134,278 @@ def _normalize_song_data(raw):
         return raw
     return []
 
+def _resolve_scan_code(keyname):
+    mapped = KEY_MAPPING.get(keyname)
+    if not mapped: return None
+    try: return keyboard.key_to_scan_codes(mapped)[0]
+    except (ValueError, IndexError): return None
+
 def preprocess_notes(song_path):
     try:
-        with open(song_path, 'r', encoding='utf-8') as f:
-            raw = json.load(f)
+        with open(song_path, 'rb') as f:
+            raw = _json_loads(f.read())
     except Exception as e:
         raise RuntimeError(f"Failed to load JSON: {e}")
 
     notes_list = _normalize_song_data(raw)
-    notes = [{'time': int(n.get('time',0)), 'key': n.get('key'), 'hold': n.get('hold')} for n in notes_list]
-
-    times = sorted(set(n['time'] for n in notes))
-    notes_by_time = {t: [] for t in times}
-    for n in notes:
-        notes_by_time[n['time']].append(n)
-
-    sorted_times = sorted(notes_by_time.keys())
-    for idx, t in enumerate(sorted_times):
-        group = notes_by_time[t]
-        next_t = sorted_times[idx+1] if idx+1 < len(sorted_times) else None
-        if next_t is None:
-            for note in group:
-                note_hold = note.get('hold') if note.get('hold') is not None else DEFAULT_HOLD_MS
-                note['hold'] = max(int(note_hold), MIN_AUTO_HOLD_MS)
-        else:
-            gap = next_t - t
-            base = max(int(gap * 0.9), MIN_AUTO_HOLD_MS)
-            use_hold = max(base, MIN_AUTO_HOLD_MS) if len(group)>=3 else base
-            max_allowed_hold = gap + ALLOW_OVERLAP_MS
-            if use_hold > max_allowed_hold:
-                use_hold = max_allowed_hold
-            for note in group:
-                explicit = note.get('hold')
-                note['hold'] = max(int(explicit), use_hold) if explicit is not None else int(use_hold)
-
-    return notes_by_time, sorted_times
+    note_times, note_keys, note_holds = [], [], []
+    for n in notes_list:
+        note_times.append(int(n.get('time',0)))
+        note_keys.append(n.get('key'))
+        hold = n.get('hold')
+        note_holds.append(-1 if hold is None else int(hold))
+    if not note_times: return _pack_song((), (0,), (), (), ())
+
+    # Auto hold per distinct time, computed over every note (mapped or not) so gaps match the sheet.
+    # The last group gets a MIN_AUTO_HOLD_MS gap, which clamps it to exactly MIN_AUTO_HOLD_MS.
+    times = np.array(note_times, dtype=np.int64)
+    group_times, group_of_note = np.unique(times, return_inverse=True)
+    gaps = np.diff(group_times, append=group_times[-1] + MIN_AUTO_HOLD_MS)
+    base = np.maximum((gaps * 0.9).astype(np.int64), MIN_AUTO_HOLD_MS)
+    use_holds = np.minimum(base, gaps + ALLOW_OVERLAP_MS)
+    holds = np.maximum(np.array(note_holds, dtype=np.int64), use_holds[group_of_note])
+
+    # Keys are resolved to OS scancodes here so playback skips keyboard's name parsing.
+    scan_by_key = {k: _resolve_scan_code(k) for k in set(note_keys)}
+    mapped = np.array([scan_by_key[k] is not None for k in note_keys], dtype=bool)
+    if not mapped.any(): return _pack_song((), (0,), (), (), ())
+    scans = np.array([scan_by_key[k] or 0 for k in note_keys], dtype=np.int64)[mapped]
+    times, holds = times[mapped], holds[mapped]
+
+    # Each press releases at the first release of its key at or after it (overlapping same-key
+    # notes are cut short by the earlier release). Keying releases by (scan, time) turns that
+    # lookup into one searchsorted over the sorted releases.
+    key_offset = scans << 40
+    releases = np.sort(key_offset + times + holds)
+    release_ms = releases[np.searchsorted(releases, key_offset + times)] - key_offset
+
+    # Presses in time order; a bucket shares one time and is pressed as one chord. Each distinct
+    # scancode gets a slot so playback can track held keys in a bitmask.
+    order = np.argsort(times, kind='stable')
+    times, scans, release_ms = times[order], scans[order], release_ms[order]
+    bucket_starts = np.flatnonzero(np.r_[True, times[1:] != times[:-1]])
+    slot_scans, press_slots = np.unique(scans, return_inverse=True)
+    return _pack_song(times[bucket_starts], np.r_[bucket_starts, len(times)], press_slots, release_ms, slot_scans)
+
+def _pack_song(bucket_times, bucket_starts, press_slots, press_release_ms, slot_scans):
+    # Structure-of-arrays song: bucket b presses slot_scans[press_slots[j]] for j in
+    # bucket_starts[b]:bucket_starts[b+1] at bucket_times[b]; press j releases at press_release_ms[j].
+    return tuple(array('q', np.asarray(a, dtype=np.int64).tobytes()) for a in
+                 (bucket_times, bucket_starts, press_slots, press_release_ms, slot_scans))
+
+def _config_fingerprint():
+    # Scancodes are baked into the cache and depend on the OS and active layout, so the resolved
+    # table is part of the fingerprint too.
+    scan_table = sorted({mapped: _resolve_scan_code(keyname) for keyname, mapped in KEY_MAPPING.items()}.items())
+    return repr((MIN_AUTO_HOLD_MS, ALLOW_OVERLAP_MS, DEFAULT_HOLD_MS, sorted(KEY_MAPPING.items()), os.name, scan_table))
+
+def _cached_preprocess(song_path):
+    # Reuse the preprocessed song stored next to the sheet while its mtime/size and the CONFIG
+    # values that shape the schedule are unchanged.
+    key = (PREPROCESS_CACHE_VERSION, os.path.getmtime(song_path), os.path.getsize(song_path), _config_fingerprint())
+    cache_path = song_path + PREPROCESS_CACHE_SUFFIX
+    # Plain .npz without pickling: the sheets folder is filled from shared downloads, so a cache file
+    # found there must never be able to run code.
+    try:
+        with np.load(cache_path, allow_pickle=False) as data:
+            if str(data['key']) == repr(key): return _pack_song(*(data[f'arr_{i}'] for i in range(5)))
+    except Exception: pass
+    song = preprocess_notes(song_path)
+    try:
+        with open(cache_path, 'wb') as f:
+            np.savez(f, *song, key=np.array(repr(key)))
+    except OSError: pass
+    return song
+
+# ---------------------- KEY OUTPUT ----------------------
+# Chords go out as one batch so simultaneous notes reach the game together. On Windows a batch is a
+# prebuilt INPUT array for a single SendInput call; elsewhere it falls back to per-key keyboard calls.
+if os.name == 'nt':
+    import ctypes
+    from ctypes import wintypes
+
+    INPUT_KEYBOARD = 1
+    KEYEVENTF_KEYUP = 0x0002
+    KEYEVENTF_SCANCODE = 0x0008
+
+    class _MOUSEINPUT(ctypes.Structure):
+        _fields_ = [("dx", wintypes.LONG), ("dy", wintypes.LONG), ("mouseData", wintypes.DWORD),
+                    ("dwFlags", wintypes.DWORD), ("time", wintypes.DWORD), ("dwExtraInfo", ctypes.c_size_t)]
+
+    class _KEYBDINPUT(ctypes.Structure):
+        _fields_ = [("wVk", wintypes.WORD), ("wScan", wintypes.WORD), ("dwFlags", wintypes.DWORD),
+                    ("time", wintypes.DWORD), ("dwExtraInfo", ctypes.c_size_t)]
+
+    class _INPUTUNION(ctypes.Union):
+        _fields_ = [("mi", _MOUSEINPUT), ("ki", _KEYBDINPUT)]
+
+    class _INPUT(ctypes.Structure):
+        _fields_ = [("type", wintypes.DWORD), ("u", _INPUTUNION)]
+
+    _SendInput = ctypes.windll.user32.SendInput
+    _SendInput.argtypes = (wintypes.UINT, ctypes.POINTER(_INPUT), ctypes.c_int)
+    _SendInput.restype = wintypes.UINT
+
+    def _key_batch(scans, key_up):
+        inputs = (_INPUT * len(scans))()
+        flags = KEYEVENTF_SCANCODE | (KEYEVENTF_KEYUP if key_up else 0)
+        for inp, scan in zip(inputs, scans):
+            inp.type = INPUT_KEYBOARD
+            inp.u.ki.wScan = scan
+            inp.u.ki.dwFlags = flags
+        return inputs
+
+    def _send_key_batch(batch):
+        if len(batch): _SendInput(len(batch), batch, ctypes.sizeof(_INPUT))
+else:
+    def _key_batch(scans, key_up):
+        return (keyboard._os_keyboard.release if key_up else keyboard._os_keyboard.press, tuple(scans))
+
+    def _send_key_batch(batch):
+        send, scans = batch
+        for scan in scans: send(scan)
+
+# ---------------------- THREAD PRIORITY ----------------------
+# The play thread asks for 1 ms timer resolution and a raised priority so its short sleeps wake on time
+# instead of on Windows' default ~15.6 ms tick. HIGHEST rather than TIME_CRITICAL keeps the keyboard
+# hook thread responsive.
+THREAD_PRIORITY_HIGHEST = 2
+
+def _enter_realtime():
+    # Returns True only if timeBeginPeriod(1) took effect and needs a matching _leave_realtime().
+    if os.name == 'nt':
+        import ctypes
+        from ctypes import wintypes
+        kernel32 = ctypes.windll.kernel32
+        kernel32.GetCurrentThread.restype = wintypes.HANDLE
+        kernel32.SetThreadPriority.argtypes = (wintypes.HANDLE, ctypes.c_int)
+        kernel32.SetThreadPriority(kernel32.GetCurrentThread(), THREAD_PRIORITY_HIGHEST)
+        return ctypes.windll.winmm.timeBeginPeriod(1) == 0  # TIMERR_NOERROR
+    if hasattr(os, 'sched_setscheduler'):
+        try: os.sched_setscheduler(0, os.SCHED_RR, os.sched_param(os.sched_get_priority_min(os.SCHED_RR)))
+        except OSError: pass  # needs root/CAP_SYS_NICE; keep the default policy
+    return False
+
+def _leave_realtime():
+    import ctypes
+    ctypes.windll.winmm.timeEndPeriod(1)
 
 # ---------------------- PLAYBACK CORE ----------------------
-def play_song_core(notes_by_time, time_keys_sorted):
-    global playing, paused, stop_requested, speed_multiplier
-    events = []
-    for t in time_keys_sorted:
-        for note in notes_by_time[t]:
-            keyname = note.get('key')
-            mapped = KEY_MAPPING.get(keyname)
-            if not mapped: continue
-            hold = int(note.get('hold', DEFAULT_HOLD_MS))
-            events.append((t, 'press', mapped))
-            events.append((t + hold, 'release', mapped))
-    events.sort(key=lambda e: (e[0], 0 if e[1]=='press' else 1))
-    release_queue = deque()
-    pressed_keys = set()
+def _sleep_until(deadline_perf):
+    # Coarse sleep to just before the deadline, capped so pause/stop/speed changes stay responsive,
+    # then yield-spin the last millisecond for precision.
+    dt = deadline_perf - time.perf_counter()
+    if dt > 0.002: time.sleep(min(dt - 0.001, 0.02))
+    else: time.sleep(0)
+
+def _rebase_segment(now_perf, speed):
+    # Caller holds _play_lock. Folds the elapsed segment into the base so virtual time stays
+    # continuous, then continues at the new speed (0.0 freezes the clock while paused).
+    global _segment_start_perf, _segment_base_ms, _segment_speed
+    _segment_base_ms += (now_perf - _segment_start_perf) * 1000.0 * _segment_speed
+    _segment_start_perf, _segment_speed = now_perf, speed
+
+def _virtual_clock():
+    # Returns (virtual ms now, segment start perf, segment base ms, segment speed).
+    with _play_lock:
+        start, base, speed = _segment_start_perf, _segment_base_ms, _segment_speed
+    return base + (time.perf_counter() - start) * 1000.0 * speed, start, base, speed
+
+@njit(cache=True, nogil=True)
+def _release_due(release_ms, held_mask, virtual_ms, due_slots):
+    # Moves every held slot whose release time has passed into due_slots.
+    # Returns (remaining held mask, due count, earliest remaining release ms).
+    n_due = 0
+    next_ms = np.inf
+    for slot in range(len(release_ms)):
+        if not (held_mask >> slot) & 1: continue
+        if release_ms[slot] <= virtual_ms:
+            due_slots[n_due] = slot; n_due += 1
+            held_mask &= ~(1 << slot)
+        elif release_ms[slot] < next_ms: next_ms = release_ms[slot]
+    return held_mask, n_due, next_ms
+
+def _release_pressed_keys():
+    # Snapshot and clear the held keys, then release exactly those in one batch.
+    with _play_lock:
+        scans = list(pressed_keys)
+        pressed_keys.clear()
+    if scans: _send_key_batch(_key_batch(scans, True))
+
+def play_song_core(song):
+    global playing, paused, stop_requested, _segment_start_perf, _segment_base_ms, _segment_speed
+    bucket_times, bucket_starts, press_slots, press_release_ms, slot_scans = song
+    # One pending-release slot per distinct key: a re-press before the release just moves the deadline,
+    # which is exactly the paired release preprocess_notes computed for it.
+    release_ms = np.zeros(len(slot_scans), dtype=np.float64)
+    due_slots = np.empty(len(slot_scans), dtype=np.int64)
+    held_mask = 0
+    bucket_scans = [tuple(slot_scans[slot] for slot in press_slots[start:end])
+                    for start, end in zip(bucket_starts, bucket_starts[1:])]
+    press_batches = [_key_batch(scans, False) for scans in bucket_scans]
+    _release_due(release_ms, 0, 0.0, due_slots)  # compile (or load cached) JIT code before the start clock runs
     perf_start = time.perf_counter() + PLAY_START_DELAY
     while time.perf_counter() < perf_start:
         if stop_requested: return
         time.sleep(0.005)
 
-    ev_idx = 0
-    total_events = len(events)
-    last_realtime = time.perf_counter()
-    virtual_ms = 0.0
-
-    def release_due(now_perf):
-        while release_queue and release_queue[0][0] <= now_perf:
-            _, k = release_queue.popleft()
-            try: keyboard.release(k)
-            except Exception: pass
-            pressed_keys.discard(k)
-
-    while ev_idx < total_events and not stop_requested:
+    press_idx = 0
+    total_buckets = len(bucket_times)
+    with _play_lock:
+        _segment_start_perf, _segment_base_ms, _segment_speed = time.perf_counter(), 0.0, speed_multiplier
+
+    def release_due(virtual_ms):
+        nonlocal held_mask
+        held_mask, n_due, next_ms = _release_due(release_ms, held_mask, virtual_ms, due_slots)
+        if n_due:
+            scans = [slot_scans[slot] for slot in due_slots[:n_due].tolist()]
+            _send_key_batch(_key_batch(scans, True))
+            with _play_lock: pressed_keys.difference_update(scans)
+        return next_ms
+
+    while press_idx < total_buckets and not stop_requested:
         if paused:
-            for k in list(pressed_keys):
-                try: keyboard.release(k)
-                except Exception: pass
-            pressed_keys.clear()
-            remaining_releases = []
-            now_perf = time.perf_counter()
-            while release_queue:
-                rt, k = release_queue.popleft()
-                remaining_releases.append((max(0.0, rt - now_perf), k))
+            _release_pressed_keys()
+            held_mask = 0
+            with _play_lock: _rebase_segment(time.perf_counter(), 0.0)
             while paused and not stop_requested: time.sleep(0.02)
             if stop_requested: break
-            now_perf = time.perf_counter()
-            for rem, k in remaining_releases: release_queue.append((now_perf + rem, k))
-            release_queue = deque(sorted(release_queue, key=lambda x: x[0]))
-            last_realtime = time.perf_counter()
+            with _play_lock: _rebase_segment(time.perf_counter(), speed_multiplier)
             continue
 
-        now = time.perf_counter()
-        elapsed = now - last_realtime
-        virtual_ms += elapsed * 1000.0 * speed_multiplier
-        last_realtime = now
-
-        while ev_idx < total_events and events[ev_idx][0] <= virtual_ms + 1e-6:
-            ev_time_ms, action, key = events[ev_idx]
-            if action == 'press':
-                try: keyboard.press(key)
-                except Exception: pass
-                pressed_keys.add(key)
-                for j in range(ev_idx+1, total_events):
-                    if events[j][1]=='release' and events[j][2]==key:
-                        release_event_ms = events[j][0]; break
-                else: release_event_ms = ev_time_ms + DEFAULT_HOLD_MS
-                time_until_release_sec = max(0.0, (release_event_ms - virtual_ms) / (1000.0 * speed_multiplier))
-                release_perf = time.perf_counter() + time_until_release_sec
-                release_queue.append((release_perf, key))
-                if len(release_queue) > 1:
-                    i = len(release_queue)-1
-                    while i>0 and release_queue[i][0]<release_queue[i-1][0]:
-                        release_queue[i], release_queue[i-1] = release_queue[i-1], release_queue[i]
-                        i -= 1
-            ev_idx += 1
-
-        release_due(time.perf_counter())
-        time.sleep(0.0009)
-
-    while release_queue:
-        now = time.perf_counter()
-        if release_queue[0][0] <= now:
-            _, k = release_queue.popleft()
-            try: keyboard.release(k)
-            except Exception: pass
-        else: time.sleep(0.001)
-    for k in list(pressed_keys):
-        try: keyboard.release(k)
-        except Exception: pass
-    pressed_keys.clear()
+        virtual_ms, seg_start, seg_base, seg_speed = _virtual_clock()
+        # bisect jumps straight past everything due, however far the clock ran ahead of the loop
+        end_idx = bisect.bisect_right(bucket_times, virtual_ms, press_idx)
+        for b in range(press_idx, end_idx):
+            _send_key_batch(press_batches[b])
+            with _play_lock: pressed_keys.update(bucket_scans[b])
+            for j in range(bucket_starts[b], bucket_starts[b+1]):
+                slot = press_slots[j]
+                release_ms[slot] = press_release_ms[j]
+                held_mask |= 1 << slot
+        press_idx = end_idx
+
+        next_ms = release_due(virtual_ms)
+        if press_idx < total_buckets: next_ms = min(next_ms, bucket_times[press_idx])
+        _sleep_until(seg_start + (next_ms - seg_base) / (1000.0 * seg_speed))
+
+    while held_mask and not stop_requested:
+        virtual_ms, seg_start, seg_base, seg_speed = _virtual_clock()
+        next_ms = release_due(virtual_ms)
+        if held_mask: _sleep_until(seg_start + (next_ms - seg_base) / (1000.0 * seg_speed))
+    _release_pressed_keys()
 
 # ---------------------- HIGH LEVEL CONTROLS ----------------------
 def select_song_by_hotkey(hk):
     global selected_index, queued_song, ready_to_play
-    if hk not in song_hotkeys: return
-    idx = song_hotkeys[hk]
+    slot = int(hk) - 1
+    if slot<0 or slot>=len(page_song_indices): return
+    idx = page_song_indices[slot]
     if idx<0 or idx>=len(music_sheets): return
     selected_index = idx
     queued_song = music_sheets[selected_index]
     ready_to_play = True
-    print(f"Selected: {os.path.basename(queued_song)} — press Space to start")
+    print(f"Selected: {music_sheet_basenames[selected_index]} — press Space to start")
 
 def start_selected_song():
     global play_thread, playing, stop_requested, last_song_index, ready_to_play
@@ -240,7 +413,7 @@ def start_selected_song():
         print("No song queued.")
         return
     stop_playback()
-    try: notes_by_time, times = preprocess_notes(queued_song)
+    try: song = _cached_preprocess(queued_song)
     except Exception as e:
         print("Failed to prepare song:", e)
         return
@@ -249,9 +422,16 @@ def start_selected_song():
     ready_to_play = False
     last_song_index = selected_index
     def worker():
-        try: play_song_core(notes_by_time, times)
+        timer_raised = False
+        try:
+            timer_raised = _enter_realtime()
+            play_song_core(song)
         except Exception as e: print("Playback error:", e)
-        finally: global playing; playing=False
+        finally:
+            try: _release_pressed_keys()  # never leave keys held in the game after a failed run
+            except Exception as e: print("Failed to release keys:", e)
+            if timer_raised: _leave_realtime()
+            global playing; playing=False
     play_thread = threading.Thread(target=worker, daemon=True)
     play_thread.start()
     print(f"▶ Started: {os.path.basename(queued_song)}")
@@ -261,9 +441,8 @@ def stop_playback():
     stop_requested = True
     playing = False
     ready_to_play = False
-    for v in KEY_MAPPING.values():
-        try: keyboard.release(v)
-        except Exception: pass
+    try: _release_pressed_keys()
+    except Exception: pass
 
 def replay_last():
     global last_song_index, selected_index, queued_song, ready_to_play
@@ -271,15 +450,20 @@ def replay_last():
     selected_index = last_song_index
     queued_song = music_sheets[selected_index]
     ready_to_play = True
-    print(f"Requeued last song: {os.path.basename(queued_song)} — press Space to start")
+    print(f"Requeued last song: {music_sheet_basenames[selected_index]} — press Space to start")
 
 def live_search():
     global music_sheets, current_page
     q = input("Search (empty to cancel): ").strip()
     if q=="": _rebuild_page(); display_ui(); return
-    results = [p for p in music_sheets if q.lower() in os.path.basename(p).lower()]
-    if results:
-        music_sheets[:] = results + [p for p in music_sheets if p not in results]
+    q = q.lower()
+    hits = [i for i, name in enumerate(music_sheet_search_names) if q in name]
+    if hits:
+        hit_set = set(hits)
+        order = hits + [i for i in range(len(music_sheets)) if i not in hit_set]
+        music_sheets[:] = [music_sheets[i] for i in order]
+        music_sheet_basenames[:] = [music_sheet_basenames[i] for i in order]
+        music_sheet_search_names[:] = [music_sheet_search_names[i] for i in order]
         current_page = 0
         _rebuild_page()
         display_ui()
@@ -296,15 +480,16 @@ def register_hotkeys():
     keyboard.add_hotkey('=', page_next)
     keyboard.add_hotkey('s', live_search)
     keyboard.add_hotkey('r', replay_last)
-    keyboard.on_press_key('up', lambda e: set_speed_flag(True, False))
-    keyboard.on_release_key('up', lambda e: set_speed_flag(False, False))
-    keyboard.on_press_key('down', lambda e: set_speed_flag(False, True))
-    keyboard.on_release_key('down', lambda e: set_speed_flag(False, False))
+    keyboard.on_press_key('up', lambda e: set_speed_direction(1))
+    keyboard.on_release_key('up', lambda e: set_speed_direction(0))
+    keyboard.on_press_key('down', lambda e: set_speed_direction(-1))
+    keyboard.on_release_key('down', lambda e: set_speed_direction(0))
 
-def set_speed_flag(up, down):
-    global _speed_up_flag, _speed_down_flag
-    _speed_up_flag = up
-    _speed_down_flag = down
+def set_speed_direction(direction):
+    global _speed_direction
+    _speed_direction = direction
+    if direction: _speed_active.set()
+    else: _speed_active.clear()
 
 def page_next():
     global current_page
@@ -322,23 +507,24 @@ def on_space_key():
         paused = not paused
         print('Paused' if paused else 'Resumed')
         if paused:
-            for k in list(KEY_MAPPING.values()):
-                try: keyboard.release(k)
-                except Exception: pass
+            try: _release_pressed_keys()
+            except Exception: pass
         return
     print('No song queued. Select with 1-9')
 
 # ---------------------- SPEED ADJUSTER THREAD ----------------------
 def _speed_adjust_loop():
-    global speed_multiplier, _speed_up_flag, _speed_down_flag
+    global speed_multiplier
     while True:
-        changed=False
-        if _speed_up_flag: speed_multiplier*=1.01; changed=True
-        if _speed_down_flag: speed_multiplier/=1.01; changed=True
-        if changed:
-            speed_multiplier = max(0.1,min(5.0,speed_multiplier))
-            print(f"Speed: {speed_multiplier*100:.0f}%")
-        time.sleep(0.06)
+        _speed_active.wait()  # idle until an up/down key is held
+        while _speed_active.is_set():
+            direction = _speed_direction
+            if direction:
+                with _play_lock:
+                    speed_multiplier = max(0.1,min(5.0,speed_multiplier * 1.01**direction))
+                    if _segment_speed: _rebase_segment(time.perf_counter(), speed_multiplier)  # frozen while paused
+                print(f"Speed: {speed_multiplier*100:.0f}%")
+            time.sleep(0.06)
 
 # ---------------------- MAIN ----------------------
 def main():
@@ -346,7 +532,6 @@ def main():
     if not music_sheets:
         print(f"No JSON files found in {MUSIC_SHEET_DIR}.")
         return
-    _rebuild_page()
     display_ui()
     register_hotkeys()
     threading.Thread(target=_speed_adjust_loop, daemon=True).start()